@@ -1,69 +1,59 @@
 # Code that is used to generate the plots: star formation rate vs propagation probability
 
-from model import Model
-import random
+from starformation.simulation import run_simulation
+from starformation.analyse import meanStarFormationRate
 import numpy as np
-import pandas as pd
-from analyse import *
-import matplotlib.pyplot as plt
 
 # All parameters, but with lowered values so that a dummy simulation can be done and without y-log scale
-REGEN_TIME = 20
-INITIAL_STARS = 200
-PROPAGATION_SPEED = 1
-MAX_RANDOM_STARS = 10
-NUM_OF_RINGS = 10
-CELLS_PER_RING = 5
-TIMESTEP = 1
-SIMDURATION = 100
+CONFIG = {
+    "REGEN_TIME": 20,
+    "INITIAL_STARS": 200,
+    "PROPAGATION_SPEED": 1,
+    "MAX_RANDOM_STARS": 10,
+    "NUM_OF_RINGS": 10,
+    "CELLS_PER_RING": 5,
+    "TIMESTEP": 1,
+    "SIMDURATION": 100,
+    "seed": 0,
+}
 propagation_list = [x for x in np.arange(0.1, 0.4, 0.01)]
 
 
-star_formation_rate = []
+def starFormationRates(config, propagation_list) -> list:
+    """
+    Simulates every propagation probability and returns the mean star formation rates
+    :param config: Simulation configuration, see starformation.simulation.DEFAULT_CONFIG
+    :param propagation_list: Propagation probabilities to simulate
+    :return: List with the mean star formation rate for every probability
+    """
+    star_formation_rate = []
 
-# Loops through a set of probabilities (probability space 0.1 to 0.4 in steps of 0.01)
-for propagation_probability in propagation_list:
+    # Loops through a set of probabilities
+    for propagation_probability in propagation_list:
+        result = run_simulation(
+            dict(config, PROPAGATION_PROBABILITY=float(propagation_probability))
+        )
+        star_formation_rate.append(meanStarFormationRate(np.array(result["rate"])))
 
-    # Model initialization
-    model = Model(
-        REGEN_TIME, propagation_probability, MAX_RANDOM_STARS, PROPAGATION_SPEED
-    )
-    model.bind_grid(NUM_OF_RINGS, CELLS_PER_RING)
-    model.bind_scheduler()
-
-    # Initialize random stars first
-    for i in range(INITIAL_STARS):
-        ring = random.choice(model.grid.rings)
-        cell = random.choice(ring.children)
-
-        while cell.current_age > 0:
-            ring = random.choice(model.grid.rings)
-            cell = random.choice(ring.children)
-
-        cell.current_age = REGEN_TIME
+    return star_formation_rate
 
-    model.scheduler.start(TIMESTEP, SIMDURATION)
-    df = pd.DataFrame(model.scheduler.history.tolist())
 
-    # Star formation rate
-    starsformed = starFormationRate(df, REGEN_TIME)
+if __name__ == "__main__":
+    import pandas as pd
+    import matplotlib.pyplot as plt
 
-    converged = convergenceCheck(starsformed)
-    mean_starformation_rate = converged.mean() - 10
+    star_formation_rate = starFormationRates(CONFIG, propagation_list)
 
-    if mean_starformation_rate < 0:
-        mean_starformation_rate = 0
-
-    star_formation_rate.append(mean_starformation_rate)
-
-print(star_formation_rate)
-data_df = pd.DataFrame()
-data_df["Pst"] = propagation_list
-data_df["Rate"] = star_formation_rate
-data_df.to_csv(f"Rate_Pst_{REGEN_TIME}_{INITIAL_STARS}_{PROPAGATION_SPEED}.csv")
+    print(star_formation_rate)
+    data_df = pd.DataFrame()
+    data_df["Pst"] = propagation_list
+    data_df["Rate"] = star_formation_rate
+    data_df.to_csv(
+        f"Rate_Pst_{CONFIG['REGEN_TIME']}_{CONFIG['INITIAL_STARS']}_{CONFIG['PROPAGATION_SPEED']}.csv"
+    )
 
-plt.plot(propagation_list, star_formation_rate)
-plt.xlabel("Pst", fontsize=20)
-plt.ylabel("Star formation rate", fontsize=20)
-# plt.yscale("log")
-plt.show()
+    plt.plot(propagation_list, star_formation_rate)
+    plt.xlabel("Pst", fontsize=20)
+    plt.ylabel("Star formation rate", fontsize=20)
+    # plt.yscale("log")
+    plt.show()
@@ -0,0 +1,4 @@
+# Self-propagating star formation of spiral galaxies.
+# Only numpy is imported here, plotting and pandas are imported by the modules and commands that need them.
+
+from .model import Model
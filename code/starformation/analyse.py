@@ -13,11 +13,27 @@ def starFormationRate(df, regenTime):
     return formationrate
 
 
+def compactStarFormationRate(history, regenTime):
+    """" Returns the number of new formed stars for each timeframe from a CompactHistory, like starFormationRate"""
+
+    frames = int(history.times[-1])
+    counts = (history.ages == regenTime).sum(axis=1)
+    formationrate = np.zeros(frames)
+    for t, count in zip(history.times, counts):
+        if t < frames:
+            formationrate[int(t)] += count
+
+    return formationrate
+
+
 def convergenceCheck(starformation):
     """Searches for the stable region of s. Returns the list starting from the stabilized point"""
     windowsize = int(len(starformation) / 10)
     if windowsize < 2:
         windowsize = 2
+    # the two windows need at least windowsize + 1 values, otherwise the search never ends
+    if len(starformation) < windowsize + 1:
+        raise ValueError("Need at least 3 timeframes to check convergence, got %d" % len(starformation))
 
     starformation_reversed = list(np.flip(starformation))
     converged = False
@@ -42,3 +58,10 @@ def convergenceCheck(starformation):
             amplitude -= 1
 
     return starformation[index:]
+
+
+def meanStarFormationRate(starformation, background=10):
+    """" Returns the mean of the stable region of the star formation rate minus the background, as in the phase plots"""
+
+    converged = convergenceCheck(starformation)
+    return max(float(converged.mean()) - background, 0.0)
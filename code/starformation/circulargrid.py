@@ -1,6 +1,14 @@
 import numpy as np
 
 
+def age_dtype(max_age):
+    """ Returns the smallest unsigned integer dtype that can hold ages up to max_age"""
+    for dtype in (np.uint8, np.uint16):
+        if max_age <= np.iinfo(dtype).max:
+            return dtype
+    raise ValueError("max_age %s does not fit in a compact age array" % max_age)
+
+
 class CircularGrid:
     """"
     Creates grid object that holds ring objects. Allow to easily calculating the neighbours of the dynamic grid
@@ -10,9 +18,17 @@ class CircularGrid:
     :param beforestep: Optional parameter, expects a function that will be called before handling every step
     :param step: Optional parameter, expects a function that will be called during handling every step
     :param afterstepstep: Optional parameter, expects a function that will be called after handling every step
+    :param age_dtype: Optional parameter, numpy dtype of the ages. When given the grid runs in compact mode: all ages
+    are kept in two flat arrays (current and next) instead of on the cell objects
     """
     def __init__(
-        self, NUM_OF_RINGS, CELLS_PER_RING, beforestep=None, step=None, afterstep=None
+        self,
+        NUM_OF_RINGS,
+        CELLS_PER_RING,
+        beforestep=None,
+        step=None,
+        afterstep=None,
+        age_dtype=None,
     ):
 
         self.NUM_OF_RINGS = NUM_OF_RINGS  # total amount of rings in the plot
@@ -23,6 +39,13 @@ class CircularGrid:
         self.afterstep = afterstep
         self.max_id = 0
 
+        # compact mode: double buffered age arrays, indexed by the flat cell index
+        self.compact = age_dtype is not None
+        self.num_of_cells = CELLS_PER_RING * NUM_OF_RINGS * (NUM_OF_RINGS + 1) // 2
+        if self.compact:
+            self.ages = np.zeros(self.num_of_cells, dtype=age_dtype)
+            self.next_ages = np.zeros(self.num_of_cells, dtype=age_dtype)
+
         # create rings
         for i in range(self.NUM_OF_RINGS):
             new_ring = Ring(i, self)
@@ -55,6 +78,14 @@ class CircularGrid:
 
         self = self.afterstep(self)
 
+    def swap_ages(self):
+        """ Makes the next ages the current ages by swapping the two age buffers (compact mode only)"""
+        self.ages, self.next_ages = self.next_ages, self.ages
+
+    def get_offsets(self):
+        """ Returns an array with the rotation offset of every ring"""
+        return np.array([ring.offset for ring in self.rings], dtype=float)
+
     def get_ring(self, ring_id):
         """ Returns a ring object for a given ring id"""
         return self.rings[ring_id]
@@ -107,12 +138,20 @@ class Ring:
         self.children = []
         self.num_of_children = (ring_id + 1) * self.parent.CELLS_PER_RING
         self.offset = 0
+        # flat index of the first cell of this ring, all inner rings come first
+        self.start = self.parent.CELLS_PER_RING * ring_id * (ring_id + 1) // 2
 
         # fill ring with grid cells
+        cell_class = CompactCell if self.parent.compact else Cell
         for i in range(self.num_of_children):
-            new_cell = Cell(self, i)
+            new_cell = cell_class(self, i)
             self.children.append(new_cell)
 
+    @property
+    def ages(self):
+        """" View on the current ages of the cells in this ring (compact mode only)"""
+        return self.parent.ages[self.start:self.start + self.num_of_children]
+
     def __repr__(self):
         """" Represent id instead of memory reference for easy debugging"""
         return "<Ring id:%s>" % (self.id)
@@ -128,6 +167,8 @@ class Cell:
 
         self.parent = parent_ring
         self.id = cell_id
+        # position in the flat order of all cells, ring by ring from the center
+        self.index = parent_ring.start + cell_id
         self.current_age = age
         self.next_age = 0
 
@@ -136,7 +177,7 @@ class Cell:
         self.theta1 = self.id * delta
         self.theta2 =  self.theta1 + delta
         # create unique identifier. Useful when cells need to evaluated outside of the ring object.
-        self.unique_id = self.parent.parent.CELLS_PER_RING * self.parent.id + self.id
+        self.unique_id = self.index
 
     def get_theta1(self):
         """"Returns the angle of polar coordinates of the start position"""
@@ -149,3 +190,31 @@ class Cell:
     def __repr__(self):
         """" Represent id instead of memory reference for easy debugging"""
         return "<Cell id:%s parent_ring:%s>" % (self.id, self.parent.id)
+
+
+class CompactCell(Cell):
+    """"
+    Cell that does not hold its own age, but reads and writes it in the age arrays of the grid.
+    Used when the grid runs in compact mode.
+    :param parent_ring: Memory reference to the ring object the cell belongs to.
+    :param cell id: The id of the cell within its ring
+    """
+    def __init__(self, parent_ring, cell_id, age=0):
+        self.grid = parent_ring.parent
+        super().__init__(parent_ring, cell_id, age)
+
+    @property
+    def current_age(self):
+        return self.grid.ages[self.index]
+
+    @current_age.setter
+    def current_age(self, age):
+        self.grid.ages[self.index] = age
+
+    @property
+    def next_age(self):
+        return self.grid.next_ages[self.index]
+
+    @next_age.setter
+    def next_age(self, age):
+        self.grid.next_ages[self.index] = age
@@ -0,0 +1,227 @@
+# Command line interface for headless runs: python -m starformation {simulate,sweep,analyse,render}
+# Plotting and pandas are only imported by the commands that need them.
+
+from .simulation import DEFAULT_CONFIG, PARAMETER_TYPES, normalise_config
+import argparse
+import json
+import os
+import sys
+
+import numpy as np
+
+
+def add_config_arguments(parser) -> None:
+    """
+    Adds an option for every simulation parameter, e.g. --regen-time for REGEN_TIME
+    """
+    group = parser.add_argument_group("simulation parameters")
+    for key, default in DEFAULT_CONFIG.items():
+        group.add_argument(
+            "--" + key.lower().replace("_", "-"),
+            dest=key,
+            type=PARAMETER_TYPES[key],
+            default=default,
+            help="default: %s" % default,
+        )
+
+
+def get_config(args) -> dict:
+    """
+    :return: The simulation configuration from the parsed arguments, exits when it is invalid
+    """
+    try:
+        return normalise_config({key: getattr(args, key) for key in DEFAULT_CONFIG})
+    except ValueError as e:
+        sys.exit("Invalid simulation parameters: %s" % e)
+
+
+def simulate(args) -> None:
+    """
+    Runs a single simulation, prints the results as json and optionally saves the compact history
+    """
+    from .simulation import build_model
+    from .analyse import compactStarFormationRate, meanStarFormationRate
+    from .clusters import clusterStatistics
+
+    model = build_model(get_config(args))
+    model.scheduler.progress_bar = not args.quiet
+    model.scheduler.start(model.config["TIMESTEP"], model.config["SIMDURATION"])
+
+    if args.output:
+        model.scheduler.history.save(args.output)
+
+    rate = compactStarFormationRate(model.scheduler.history, model.config["REGEN_TIME"])
+    result = {
+        "config": model.config,
+        "mean_rate": meanStarFormationRate(rate),
+        "clusters": clusterStatistics(model.grid),
+    }
+    print(json.dumps(result, indent=2, default=float))
+
+
+def sweep(args) -> None:
+    """
+    Runs the simulations for a range of propagation probabilities through the job server,
+    and writes a Rate_Pst file per replicate, like phaseplots.py
+    """
+    import asyncio
+    from .analyse import meanStarFormationRate
+    from .jobserver import JobServer
+
+    config = get_config(args)
+    probabilities = np.arange(args.start, args.stop, args.step).round(10).tolist()
+
+    async def run():
+        async with JobServer(args.cache_dir, args.workers) as server:
+            jobs = {}
+            for replicate in range(args.replicates):
+                for probability in probabilities:
+                    job_config = dict(
+                        config,
+                        PROPAGATION_PROBABILITY=probability,
+                        seed=config["seed"] + replicate,
+                    )
+                    jobs[replicate, probability] = await server.submit(job_config)
+
+            done = 0
+            for finished in asyncio.as_completed([job.result() for job in jobs.values()]):
+                await finished
+                done += 1
+                print("%d/%d simulations done" % (done, len(jobs)), file=sys.stderr)
+
+            return {key: await job.result() for key, job in jobs.items()}
+
+    results = asyncio.run(run())
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    for replicate in range(args.replicates):
+        filename = os.path.join(
+            args.output_dir,
+            "Rate_Pst_%d_%d_%d.csv"
+            % (config["REGEN_TIME"], config["INITIAL_STARS"], replicate + 1),
+        )
+        with open(filename, "w") as f:
+            f.write(",Pst,Rate\n")
+            for i, probability in enumerate(probabilities):
+                rate = meanStarFormationRate(
+                    np.array(results[replicate, probability]["rate"])
+                )
+                f.write("%d,%s,%s\n" % (i, probability, rate))
+        print(filename)
+
+
+def analyse(args) -> None:
+    """
+    Combines the replicate Rate_Pst files in a directory and fits the critical point
+    """
+    from .ensemble import find_rate_files, rate_ensemble, fit_critical_point
+
+    groups = find_rate_files(args.directory)
+    if not groups:
+        sys.exit("No Rate_Pst files found in %s" % args.directory)
+
+    results = {}
+    for (regen, stars), filenames in sorted(groups.items()):
+        try:
+            result = rate_ensemble(
+                filenames, num_bootstrap=args.bootstrap, confidence=args.confidence, seed=args.seed
+            )
+        except ValueError as e:
+            print("REGEN_TIME=%d INITIAL_STARS=%d skipped: %s" % (regen, stars, e), file=sys.stderr)
+            continue
+        results[regen, stars] = result
+        for filename, reason in result["skipped"]:
+            print("skipped %s: %s" % (filename, reason), file=sys.stderr)
+
+        print("REGEN_TIME=%d INITIAL_STARS=%d replicates=%d" % (regen, stars, result["n"]))
+        print("%8s %10s %10s %10s %10s" % ("Pst", "mean", "std", "low", "high"))
+        for row in zip(result["pst"], result["mean"], result["std"], result["low"], result["high"]):
+            print("%8.3f %10.4f %10.4f %10.4f %10.4f" % row)
+        try:
+            fit = fit_critical_point(result["pst"], result["mean"])
+            print("critical point pc=%.4f beta=%.4f" % (fit["pc"], fit["beta"]))
+            if fit["at_edge"]:
+                print("warning: pc is at the edge of the searched range, the fit did not converge")
+        except ValueError as e:
+            print("no critical point fit: %s" % e)
+        print()
+
+    if args.plot:
+        import matplotlib.pyplot as plt
+
+        for (regen, stars), result in results.items():
+            plt.errorbar(
+                result["pst"],
+                result["mean"],
+                yerr=[result["mean"] - result["low"], result["high"] - result["mean"]],
+                label="REGEN_TIME=%d, %d stars" % (regen, stars),
+            )
+        plt.xlabel("Pst", fontsize=20)
+        plt.ylabel("Star formation rate", fontsize=20)
+        plt.legend()
+        plt.show()
+
+
+def render(args) -> None:
+    """
+    Renders the animation of a compact history saved by simulate
+    """
+    import pandas as pd
+    from .circulargrid import CircularGrid
+    from .history import CompactHistory
+    from .visualise import Visualise
+
+    history = CompactHistory.load(args.history)
+    df = pd.DataFrame(history.tolist())
+    grid = CircularGrid(history.NUM_OF_RINGS, history.CELLS_PER_RING)
+
+    plotter = Visualise(grid)
+    plotter.animate(df, args.name)
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m starformation",
+        description="Self-propagating star formation of spiral galaxies",
+    )
+    commands = parser.add_subparsers(dest="command")
+    commands.required = True
+
+    parser_simulate = commands.add_parser("simulate", help="run a single simulation")
+    add_config_arguments(parser_simulate)
+    parser_simulate.add_argument("-o", "--output", help="save the compact history to this .npz file")
+    parser_simulate.add_argument("-q", "--quiet", action="store_true", help="no progress bar")
+    parser_simulate.set_defaults(func=simulate)
+
+    parser_sweep = commands.add_parser(
+        "sweep", help="star formation rate for a range of propagation probabilities"
+    )
+    add_config_arguments(parser_sweep)
+    parser_sweep.add_argument("--start", type=float, default=0.1)
+    parser_sweep.add_argument("--stop", type=float, default=0.4)
+    parser_sweep.add_argument("--step", type=float, default=0.01)
+    parser_sweep.add_argument("--replicates", type=int, default=1)
+    parser_sweep.add_argument("--workers", type=int, default=None)
+    parser_sweep.add_argument("--cache-dir", default=".simcache")
+    parser_sweep.add_argument("--output-dir", default=".")
+    parser_sweep.set_defaults(func=sweep)
+
+    parser_analyse = commands.add_parser(
+        "analyse", help="combine the Rate_Pst replicates in a directory"
+    )
+    parser_analyse.add_argument("directory")
+    parser_analyse.add_argument("--bootstrap", type=int, default=1000)
+    parser_analyse.add_argument("--confidence", type=float, default=0.95)
+    parser_analyse.add_argument("--seed", type=int, default=0)
+    parser_analyse.add_argument("--plot", action="store_true")
+    parser_analyse.set_defaults(func=analyse)
+
+    parser_render = commands.add_parser("render", help="animate a saved compact history")
+    parser_render.add_argument("history")
+    parser_render.add_argument(
+        "--name", default="history", help="the animation is saved as animation_{name}.gif"
+    )
+    parser_render.set_defaults(func=render)
+
+    args = parser.parse_args(argv)
+    args.func(args)
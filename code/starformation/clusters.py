@@ -0,0 +1,84 @@
+# Class that looks for clusters and determines the number of clusters and the clustersize
+
+import numpy as np
+
+
+class Clusters(object):
+    """ 
+    Class that clusters features. Code based on Trackpy library code
+    """
+
+    @classmethod
+    def from_grid(cls, grid, length, min_age) -> list:
+
+        clusters = cls(range(length))
+        for ring in grid.rings:
+            for cell in ring.children:
+                if cell.current_age < min_age:
+                    continue
+                neighbours = grid.get_neighbours(cell)
+                for neighbour in neighbours:
+                    if neighbour.current_age >= min_age:
+                        clusters.add(cell.unique_id, neighbour.unique_id)
+                        clusters.count_bonds(cell.unique_id, neighbour.unique_id)
+
+        return clusters
+
+    def __init__(self, indices):
+        self.clusters = {i: {i} for i in indices}
+        self.bonds = np.zeros(len(indices), dtype=int)
+        self.pos_ids = list(indices)
+
+    def __iter__(self):
+        return (list(self.clusters[k]) for k in self.clusters)
+
+    def add(self, a, b) -> None:
+        """
+        Adds links between cells for a cluster
+        :param a: First cell
+        :param b: Second cell
+        :return: None
+        """
+        i1 = self.pos_ids[a]
+        i2 = self.pos_ids[b]
+        if i1 != i2:  # if a and b are already clustered, do nothing
+            self.clusters[i1] = self.clusters[i1].union(self.clusters[i2])
+            for f in self.clusters[i2]:
+                self.pos_ids[f] = i1
+            del self.clusters[i2]
+
+    def count_bonds(self, a, b) -> None:
+        """
+        Adds bonds to a and b
+        """
+        self.bonds[a] += 1
+        self.bonds[b] += 1
+
+    @property
+    def cluster_size(self):
+        """
+        Cluster size property
+        """
+        result = [None] * len(self.pos_ids)
+        for cluster in self:
+            for f in cluster:
+                result[f] = len(cluster)
+        return result
+
+
+def clusterStatistics(grid, min_age=1) -> dict:
+    """
+    Summarises the clusters of stars with at least min_age in a grid, like the plots of this file
+    :param grid: The grid with class CircularGrid
+    :param min_age: Minimal age of a cell to be part of a cluster
+    :return: Dictionary with the mean cluster size per clustered cell, the max cluster size and number of clusters
+    """
+    clusters = Clusters.from_grid(grid, grid.num_of_cells, min_age)
+    sizes = [len(cluster) for cluster in clusters if len(cluster) != 1]
+    cluster_data = np.array([x for x in clusters.cluster_size if x != 1])
+
+    return {
+        "mean_size": float(cluster_data.mean()) if len(cluster_data) else 0.0,
+        "max_size": max(sizes, default=0),
+        "num_clusters": len(sizes),
+    }
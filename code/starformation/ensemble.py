@@ -0,0 +1,366 @@
+# Ensemble statistics over replicate runs. The runs are read one at a time and combined with running
+# statistics, so hundreds of replicates can be combined without loading them all in memory.
+
+from .simulation import RESULT_VERSION
+from collections import Counter
+import numpy as np
+import csv
+import json
+import os
+import re
+import zipfile
+
+RATE_FILE = re.compile(r"Rate_Pst_(\d+)_(\d+)_(\d+)\.csv$")
+
+
+class RunningStats:
+    """
+    Running mean and variance of equally shaped arrays (Welford's algorithm)
+    """
+
+    def __init__(self):
+        self.n = 0
+        self.mean = None
+        self.m2 = None
+
+    def add(self, x) -> None:
+        """
+        Adds a single replicate
+        :param x: Number or array, with the same shape as the earlier replicates
+        :return: None
+        """
+        x = np.asarray(x, dtype=float)
+        if self.mean is None:
+            self.mean = np.zeros_like(x)
+            self.m2 = np.zeros_like(x)
+        elif x.shape != self.mean.shape:
+            raise ValueError(
+                "Replicate with shape %s, expected %s" % (x.shape, self.mean.shape)
+            )
+
+        self.n += 1
+        delta = x - self.mean
+        self.mean += delta / self.n
+        self.m2 += delta * (x - self.mean)
+
+    def merge(self, other) -> None:
+        """
+        Combines the statistics of another RunningStats object into this one, e.g. from a separate pass
+        :param other: RunningStats object
+        :return: None
+        """
+        if other.n == 0:
+            return
+        if self.n == 0:
+            self.n, self.mean, self.m2 = other.n, other.mean.copy(), other.m2.copy()
+            return
+
+        n = self.n + other.n
+        delta = other.mean - self.mean
+        self.mean = self.mean + delta * other.n / n
+        self.m2 = self.m2 + other.m2 + delta ** 2 * self.n * other.n / n
+        self.n = n
+
+    @property
+    def variance(self):
+        """
+        Sample variance, nan with less than two replicates
+        """
+        if self.n < 2:
+            return np.full_like(self.mean, np.nan)
+        return self.m2 / (self.n - 1)
+
+    @property
+    def std(self):
+        return np.sqrt(self.variance)
+
+    @property
+    def sem(self):
+        """
+        Standard error of the mean
+        """
+        return self.std / np.sqrt(self.n)
+
+
+class PoissonBootstrap:
+    """
+    Streaming bootstrap of the mean. Every replicate gets a Poisson(1) weight in each bootstrap sample,
+    so the samples can be built up one replicate at a time.
+    :param num_samples: Number of bootstrap samples
+    :param seed: Seed of the random generator
+    """
+
+    def __init__(self, num_samples=1000, seed=None):
+        self.num_samples = num_samples
+        self.rng = np.random.default_rng(seed)
+        self.sums = None
+        self.weights = np.zeros(num_samples)
+
+    def add(self, x) -> None:
+        """
+        Adds a single replicate
+        :param x: Number or array, with the same shape as the earlier replicates
+        :return: None
+        """
+        x = np.asarray(x, dtype=float)
+        if self.sums is None:
+            self.sums = np.zeros((self.num_samples,) + x.shape)
+
+        w = self.rng.poisson(1, self.num_samples)
+        self.sums += w.reshape((-1,) + (1,) * x.ndim) * x
+        self.weights += w
+
+    def interval(self, confidence=0.95) -> tuple:
+        """
+        Percentile confidence interval of the mean
+        :param confidence: Confidence level of the interval
+        :return: Tuple of arrays (low, high)
+        """
+        with np.errstate(invalid="ignore", divide="ignore"):
+            means = self.sums / self.weights.reshape((-1,) + (1,) * (self.sums.ndim - 1))
+        alpha = (1 - confidence) / 2
+        low, high = np.nanpercentile(means, [100 * alpha, 100 * (1 - alpha)], axis=0)
+        return low, high
+
+
+def ensemble(replicates, num_bootstrap=1000, confidence=0.95, seed=None) -> dict:
+    """
+    Combines replicates in a single pass
+    :param replicates: Iterable of numbers or equally shaped arrays, e.g. a generator that reads the runs one by one
+    :param num_bootstrap: Number of bootstrap samples for the confidence interval
+    :param confidence: Confidence level of the interval
+    :param seed: Seed of the bootstrap
+    :return: Dictionary with the number of replicates n, mean, std, and the interval bounds low and high
+    """
+    stats = RunningStats()
+    bootstrap = PoissonBootstrap(num_bootstrap, seed)
+    for x in replicates:
+        stats.add(x)
+        bootstrap.add(x)
+
+    if stats.n == 0:
+        raise ValueError("No replicates to combine")
+
+    low, high = bootstrap.interval(confidence)
+    return {
+        "n": stats.n,
+        "mean": stats.mean,
+        "std": stats.std,
+        "low": low,
+        "high": high,
+    }
+
+
+def read_rate_file(filename) -> tuple:
+    """
+    Reads a Rate_Pst file as written by phaseplots.py
+    :param filename: Path of the csv file
+    :return: Tuple of arrays (Pst, Rate)
+    """
+    pst = []
+    rate = []
+    with open(filename, newline="") as f:
+        for row in csv.DictReader(f):
+            pst.append(float(row["Pst"]))
+            rate.append(float(row["Rate"]))
+    return np.array(pst), np.array(rate)
+
+
+def find_rate_files(directory) -> dict:
+    """
+    Groups the Rate_Pst_{regen}_{stars}_{replicate}.csv files in a directory
+    :param directory: Directory to search
+    :return: Dictionary {(regen time, initial stars): [paths ordered by replicate]}
+    """
+    groups = {}
+    for filename in os.listdir(directory):
+        match = RATE_FILE.match(filename)
+        if not match:
+            continue
+        regen, stars, replicate = (int(x) for x in match.groups())
+        groups.setdefault((regen, stars), []).append(
+            (replicate, os.path.join(directory, filename))
+        )
+    return {key: [path for _, path in sorted(files)] for key, files in groups.items()}
+
+
+def rate_ensemble(filenames, **kwargs) -> dict:
+    """
+    Combines the replicates of the rate vs Pst files. The Pst values of most files are used as reference,
+    files with other Pst values are skipped and reported in "skipped".
+    :param filenames: Paths of Rate_Pst files
+    :param kwargs: Passed to ensemble()
+    :return: Dictionary of ensemble() with the Pst values and a list of (filename, reason) of the skipped files
+    """
+    filenames = list(filenames)
+
+    # first pass over the Pst columns only, to find the reference Pst values
+    file_pst = {filename: read_rate_file(filename)[0] for filename in filenames}
+    counts = Counter(tuple(pst.round(10)) for pst in file_pst.values())
+    if not counts:
+        raise ValueError("No replicates to combine")
+    pst = np.array(counts.most_common(1)[0][0])
+
+    skipped = []
+
+    def replicates():
+        for filename in filenames:
+            if file_pst[filename].shape != pst.shape:
+                skipped.append(
+                    (filename, "%d Pst values, expected %d" % (len(file_pst[filename]), len(pst)))
+                )
+            elif not np.allclose(pst, file_pst[filename]):
+                skipped.append((filename, "different Pst values"))
+            else:
+                yield read_rate_file(filename)[1]
+
+    result = ensemble(replicates(), **kwargs)
+    result["pst"] = pst
+    result["skipped"] = skipped
+    return result
+
+
+def _history_ages_counts(filename, regen_time, chunk_rows=1024):
+    """
+    Counts the cells with age regen_time per step of a compact .npz history, reading the ages in chunks of rows
+    :return: Tuple of arrays (times, counts)
+    """
+    with np.load(filename) as data:
+        times = data["times"]
+
+    counts = []
+    with zipfile.ZipFile(filename) as archive, archive.open("ages.npy") as f:
+        version = np.lib.format.read_magic(f)
+        if version == (1, 0):
+            shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(f)
+        else:
+            shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(f)
+        if fortran_order:
+            raise ValueError("%s stores the ages in Fortran order" % filename)
+
+        steps, cells = shape
+        for start in range(0, steps, chunk_rows):
+            rows = min(chunk_rows, steps - start)
+            chunk = np.frombuffer(f.read(rows * cells * dtype.itemsize), dtype=dtype)
+            counts.append((chunk.reshape(rows, cells) == regen_time).sum(axis=1))
+
+    return times, np.concatenate(counts) if counts else np.zeros(0, dtype=int)
+
+
+def history_rate(filename, regen_time, chunk_rows=1024) -> np.array:
+    """
+    Star formation rate of a saved history, like analyse.starFormationRate but without loading the history.
+    A csv history (as written by varying_prob.py) is read row by row, the ages of a compact .npz history
+    (as saved by CompactHistory.save) are read in chunks of steps.
+    :param filename: Path of the history
+    :param regen_time: REGEN_TIME of the simulation
+    :param chunk_rows: Number of steps of a compact history that are read at once
+    :return: Array with the number of new formed stars for each timeframe
+    """
+    counts = {}
+    frames = 0
+    if filename.endswith(".npz"):
+        times, step_counts = _history_ages_counts(filename, regen_time, chunk_rows)
+        for t, count in zip(times, step_counts):
+            counts[int(t)] = counts.get(int(t), 0) + int(count)
+        frames = int(times[-1]) if len(times) else 0
+    else:
+        with open(filename, newline="") as f:
+            for row in csv.DictReader(f):
+                t = int(float(row["t"]))
+                frames = max(frames, t)
+                if int(float(row["age"])) == regen_time:
+                    counts[t] = counts.get(t, 0) + 1
+
+    formationrate = np.zeros(frames)
+    for t, count in counts.items():
+        if t < frames:
+            formationrate[t] = count
+    return formationrate
+
+
+def iter_cached_results(cache_dir, **params):
+    """
+    Reads the results of the current RESULT_VERSION in the job server cache one by one
+    :param cache_dir: Directory of the result cache
+    :param params: Only yield results whose configuration has these values
+    :return: Generator of result dictionaries
+    """
+    for filename in sorted(os.listdir(cache_dir)):
+        if not filename.endswith(".json"):
+            continue
+        with open(os.path.join(cache_dir, filename)) as f:
+            result = json.load(f)
+        # results of an older version are stale, the job server recomputes them
+        if result.get("version") != RESULT_VERSION:
+            continue
+        if all(result["config"].get(k) == v for k, v in params.items()):
+            yield result
+
+
+def cluster_ensemble(results, **kwargs) -> dict:
+    """
+    Combines the cluster statistics of replicate runs
+    :param results: Iterable of results with a "clusters" dictionary, e.g. iter_cached_results()
+    :param kwargs: Passed to ensemble()
+    :return: Dictionary of ensemble() with an entry for every cluster statistic
+    """
+    keys = None
+
+    def replicates():
+        nonlocal keys
+        for result in results:
+            clusters = result["clusters"]
+            if keys is None:
+                keys = sorted(clusters)
+            yield [clusters[key] for key in keys]
+
+    result = ensemble(replicates(), **kwargs)
+    return {
+        key: {name: value if name == "n" else value[i] for name, value in result.items()}
+        for i, key in enumerate(keys)
+    }
+
+
+def fit_critical_point(pst, rate, num_candidates=200, pc_min=0.0) -> dict:
+    """
+    Fits rate = amplitude * (Pst - pc)^beta above the critical point pc, by a grid search over pc
+    with a least squares fit of log(rate) vs log(Pst - pc) for every candidate.
+    The candidates for pc run from pc_min up to the lowest Pst with a positive rate. When the best pc is
+    the first or last candidate, at_edge is True: the minimum lies outside the searched range, so pc and beta
+    are bounds rather than a fit.
+    :param pst: Array of propagation probabilities
+    :param rate: Array of (mean) star formation rates
+    :param num_candidates: Number of values of pc that are tried
+    :param pc_min: Lowest value of pc that is tried
+    :return: Dictionary with pc, beta, amplitude, the mean squared residual of the log fit and at_edge
+    """
+    pst = np.asarray(pst, dtype=float)
+    rate = np.asarray(rate, dtype=float)
+    active = rate > 0
+    if active.sum() < 3:
+        raise ValueError("Need at least three points with a positive rate to fit")
+
+    first_active = pst[active].min()
+    if pc_min >= first_active:
+        raise ValueError("pc_min has to be below the lowest Pst with a positive rate")
+
+    candidates = np.linspace(pc_min, first_active, num_candidates, endpoint=False)
+    x_active = pst[active]
+    y = np.log(rate[active])
+
+    best = None
+    for i, pc in enumerate(candidates):
+        x = np.log(x_active - pc)
+        beta, intercept = np.polyfit(x, y, 1)
+        residual = np.mean((y - (beta * x + intercept)) ** 2)
+        if best is None or residual < best["residual"]:
+            best = {
+                "pc": pc,
+                "beta": beta,
+                "amplitude": np.exp(intercept),
+                "residual": residual,
+                "at_edge": i in (0, len(candidates) - 1),
+            }
+
+    return best
@@ -0,0 +1,138 @@
+# Compact storage of the simulation history. Only the ages and ring offsets are stored every step,
+# the geometry of the cells is derived from (ring, id, offset) when the history is exported.
+
+import numpy as np
+
+
+class CompactHistory:
+    """
+    Holds the ages of all cells for every timestep in one small integer array per step.
+    Exports to the same records as the full history of the scheduler with tolist()
+    :param NUM_OF_RINGS: Number of rings of the recorded grid
+    :param CELLS_PER_RING: Number of cells that are added in every new ring of the recorded grid
+    :param age_dtype: Numpy dtype of the stored ages
+    """
+
+    @classmethod
+    def from_grid(cls, grid):
+        """
+        Creates an empty history for a CircularGrid object in compact mode
+        """
+        return cls(grid.NUM_OF_RINGS, grid.CELLS_PER_RING, grid.ages.dtype)
+
+    def __init__(self, NUM_OF_RINGS, CELLS_PER_RING, age_dtype=np.uint8):
+        self.NUM_OF_RINGS = NUM_OF_RINGS
+        self.CELLS_PER_RING = CELLS_PER_RING
+        self.age_dtype = np.dtype(age_dtype)
+        self.times = []
+        self.frames = []
+        self.offsets = []
+
+        # layout of the flat cell index, shared by every timestep
+        ring_sizes = (np.arange(self.NUM_OF_RINGS) + 1) * self.CELLS_PER_RING
+        self.parent_ring = np.repeat(np.arange(self.NUM_OF_RINGS), ring_sizes)
+        starts = np.repeat(np.cumsum(ring_sizes) - ring_sizes, ring_sizes)
+        self.cell_id = np.arange(len(self.parent_ring)) - starts
+
+    def __len__(self):
+        return len(self.frames)
+
+    def append(self, t, ages, offsets) -> None:
+        """
+        Stores a single timestep
+        :param t: Timestamp of the step
+        :param ages: Array with the age of every cell, in flat cell order
+        :param offsets: Array with the rotation offset of every ring
+        :return: None
+        """
+        self.times.append(t)
+        self.frames.append(np.array(ages, dtype=self.age_dtype))
+        self.offsets.append(np.array(offsets, dtype=float))
+
+    @property
+    def ages(self) -> np.array:
+        """
+        :return: 2D array of ages with shape (timesteps, cells)
+        """
+        if not self.frames:
+            return np.zeros((0, len(self.parent_ring)), dtype=self.age_dtype)
+        return np.stack(self.frames)
+
+    @property
+    def nbytes(self) -> int:
+        """
+        :return: Number of bytes used by the stored steps
+        """
+        return sum(frame.nbytes for frame in self.frames) + sum(
+            offset.nbytes for offset in self.offsets
+        )
+
+    def get_theta(self, step) -> tuple:
+        """
+        Derives the start and end angles of every cell at a stored step
+        :param step: Index of the stored step
+        :return: Tuple of arrays (theta1, theta2)
+        """
+        delta = 2 * np.pi / ((self.parent_ring + 1) * self.CELLS_PER_RING)
+        theta1 = self.cell_id * delta + self.offsets[step][self.parent_ring]
+        return theta1, theta1 + delta
+
+    def columns(self, step) -> dict:
+        """
+        Expands a single stored step to columns
+        :param step: Index of the stored step
+        :return: Dictionary of arrays with keys t, id, age, parent_ring, theta1, theta2
+        """
+        theta1, theta2 = self.get_theta(step)
+        return {
+            "t": np.full(len(self.cell_id), self.times[step]),
+            "id": self.cell_id,
+            "age": self.frames[step],
+            "parent_ring": self.parent_ring,
+            "theta1": theta1,
+            "theta2": theta2,
+        }
+
+    def tolist(self) -> list:
+        """
+        :return: List of dictionaries with all the cell states of every step, like the full history
+        """
+        data = []
+        for step in range(len(self)):
+            columns = self.columns(step)
+            keys = list(columns)
+            for values in zip(*(columns[key].tolist() for key in keys)):
+                data.append(dict(zip(keys, values)))
+        return data
+
+    def save(self, filename) -> None:
+        """
+        Saves the compact history to a compressed numpy file
+        :param filename: Path of the .npz file
+        :return: None
+        """
+        np.savez_compressed(
+            filename,
+            NUM_OF_RINGS=self.NUM_OF_RINGS,
+            CELLS_PER_RING=self.CELLS_PER_RING,
+            times=np.array(self.times),
+            ages=self.ages,
+            offsets=np.array(self.offsets, dtype=float).reshape(len(self), self.NUM_OF_RINGS),
+        )
+
+    @classmethod
+    def load(cls, filename):
+        """
+        Loads a compact history saved with save()
+        :param filename: Path of the .npz file
+        :return: CompactHistory object
+        """
+        with np.load(filename) as data:
+            ages = data["ages"]
+            history = cls(
+                int(data["NUM_OF_RINGS"]), int(data["CELLS_PER_RING"]), ages.dtype
+            )
+            history.times = data["times"].tolist()
+            history.frames = list(ages)
+            history.offsets = list(data["offsets"])
+        return history
@@ -0,0 +1,295 @@
+# Local job service for queued simulations. An asyncio front end hands the simulations to a pool of worker
+# processes, and the results are cached on disk, keyed by a hash of the configuration.
+# Identical configurations (including the seed) are only simulated once.
+
+from .simulation import RESULT_VERSION, normalise_config, run_simulation
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import asyncio
+import hashlib
+import json
+import multiprocessing
+import os
+
+CACHE_DIR = ".simcache"
+
+
+def config_key(config) -> str:
+    """
+    :return: Hash of the complete configuration and RESULT_VERSION, used as cache key
+    """
+    payload = {"version": RESULT_VERSION, "config": normalise_config(config)}
+    text = json.dumps(payload, sort_keys=True)
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+def _run_job(key, config, queue) -> dict:
+    """
+    Runs a simulation in a worker process, and sends the progress to the server through queue
+    """
+
+    def report(done, total):
+        # limit the messages to about a hundred per job
+        if done == total or done % max(1, total // 100) == 0:
+            queue.put((key, done, total))
+
+    try:
+        return run_simulation(config, report)
+    finally:
+        # marks the end of the progress messages of this job
+        queue.put((key, None, None))
+
+
+class ResultCache:
+    """
+    Stores simulation results as json files in a directory, one file per cache key
+    :param directory: Directory of the cache, created when it does not exist
+    """
+
+    def __init__(self, directory=CACHE_DIR):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, key) -> str:
+        return os.path.join(self.directory, key + ".json")
+
+    def get(self, key):
+        """
+        :return: The cached result for key, None if there is none or it is from an older RESULT_VERSION
+        """
+        try:
+            with open(self.path(key)) as f:
+                result = json.load(f)
+        except FileNotFoundError:
+            return None
+        if result.get("version") != RESULT_VERSION:
+            return None
+        return result
+
+    def put(self, key, result) -> None:
+        """
+        Saves a result, written to a temporary file first so readers never see half a result
+        """
+        tmp = self.path(key) + ".%d.tmp" % os.getpid()
+        with open(tmp, "w") as f:
+            json.dump(result, f)
+        os.replace(tmp, self.path(key))
+
+
+class Job:
+    """
+    A submitted simulation. Clients can stream its progress and await its result
+    :param key: Cache key of the configuration
+    :param config: Complete simulation configuration
+    """
+
+    def __init__(self, key, config):
+        self.key = key
+        self.config = config
+        self.cached = False
+        self.done_steps = 0
+        self.total_steps = None
+        self.future = asyncio.get_running_loop().create_future()
+        self._listeners = []
+
+    def __repr__(self):
+        return "<Job key:%s>" % self.key[:12]
+
+    def done(self) -> bool:
+        return self.future.done()
+
+    def report(self, done, total) -> None:
+        """
+        Publishes the progress of the job to all listeners
+        """
+        self.done_steps = done
+        self.total_steps = total
+        for queue in self._listeners:
+            queue.put_nowait((done, total))
+
+    def finish(self, result=None, exception=None) -> None:
+        """
+        Completes the job with either a result or an exception
+        """
+        if exception is not None:
+            self.future.set_exception(exception)
+        else:
+            self.future.set_result(result)
+        for queue in self._listeners:
+            queue.put_nowait(None)
+
+    async def progress(self):
+        """
+        Async generator with (completed iterations, total iterations) until the job is done
+        """
+        if self.done():
+            return
+        queue = asyncio.Queue()
+        self._listeners.append(queue)
+        try:
+            while True:
+                item = await queue.get()
+                if item is None:
+                    return
+                yield item
+        finally:
+            self._listeners.remove(queue)
+
+    async def result(self) -> dict:
+        """
+        :return: The result of the simulation, see run_simulation
+        """
+        return await asyncio.shield(self.future)
+
+
+class JobServer:
+    """
+    Runs simulations in a pool of worker processes. Results are cached on disk and
+    jobs with the same configuration as a running job are joined instead of started again.
+    Use as async context manager, or call close() when done.
+    :param cache_dir: Directory of the result cache
+    :param workers: Number of worker processes, defaults to the number of cpus
+    """
+
+    def __init__(self, cache_dir=CACHE_DIR, workers=None):
+        self.cache = ResultCache(cache_dir)
+        self.workers = workers
+        self.jobs = {}
+        self.started = False
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def start(self) -> None:
+        """
+        Starts the worker pool and the task that forwards the progress of the workers
+        """
+        if self.started:
+            return
+        self._manager = multiprocessing.Manager()
+        self._queue = self._manager.Queue()
+        self._executor = ProcessPoolExecutor(self.workers)
+        self._drained = {}
+        self._progress_task = asyncio.create_task(self._forward_progress())
+        self.started = True
+
+    async def close(self) -> None:
+        """
+        Waits for the running jobs and stops the workers
+        """
+        if not self.started:
+            return
+        await asyncio.gather(*(job.future for job in self.jobs.values()), return_exceptions=True)
+        self._queue.put(None)
+        await self._progress_task
+        self._executor.shutdown()
+        self._manager.shutdown()
+        self.started = False
+
+    async def _forward_progress(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            item = await loop.run_in_executor(None, self._queue.get)
+            if item is None:
+                return
+            key, done, total = item
+            if done is None:
+                if key in self._drained:
+                    self._drained[key].set()
+            elif key in self.jobs:
+                self.jobs[key].report(done, total)
+
+    async def _execute(self, job) -> dict:
+        """
+        Runs the simulation of a job in the worker pool, and waits until its progress is forwarded
+        """
+        loop = asyncio.get_running_loop()
+        drained = self._drained[job.key] = asyncio.Event()
+        try:
+            result = await loop.run_in_executor(
+                self._executor, _run_job, job.key, job.config, self._queue
+            )
+            await drained.wait()
+            return result
+        finally:
+            del self._drained[job.key]
+
+    async def _run(self, job) -> None:
+        try:
+            result = await self._execute(job)
+        except Exception as e:
+            job.finish(exception=e)
+        else:
+            self.cache.put(job.key, result)
+            job.finish(result)
+        finally:
+            del self.jobs[job.key]
+
+    async def submit(self, config) -> Job:
+        """
+        Queues a simulation, unless it is cached or already running
+        :param config: Simulation configuration, see DEFAULT_CONFIG
+        :return: Job object of the simulation
+        """
+        config = normalise_config(config)
+        key = config_key(config)
+
+        if key in self.jobs:
+            return self.jobs[key]
+
+        job = Job(key, config)
+        result = self.cache.get(key)
+        if result is not None:
+            job.cached = True
+            job.finish(result)
+            return job
+
+        await self.start()
+        self.jobs[key] = job
+        asyncio.create_task(self._run(job))
+        return job
+
+    async def rate(self, config) -> list:
+        """
+        :return: The star formation rate series of a simulation
+        """
+        job = await self.submit(config)
+        return (await job.result())["rate"]
+
+    async def clusters(self, config) -> dict:
+        """
+        :return: The cluster statistics at the end of a simulation
+        """
+        job = await self.submit(config)
+        return (await job.result())["clusters"]
+
+
+class InProcessJobServer(JobServer):
+    """
+    Stand-in for JobServer that runs the simulations one at a time in a thread of the current process.
+    Has the same interface and cache, but needs no worker processes, which makes it suited for tests.
+    """
+
+    async def start(self) -> None:
+        if self.started:
+            return
+        self._executor = ThreadPoolExecutor(1)
+        self.started = True
+
+    async def close(self) -> None:
+        if not self.started:
+            return
+        await asyncio.gather(*(job.future for job in self.jobs.values()), return_exceptions=True)
+        self._executor.shutdown()
+        self.started = False
+
+    async def _execute(self, job) -> dict:
+        loop = asyncio.get_running_loop()
+
+        def report(done, total):
+            loop.call_soon_threadsafe(job.report, done, total)
+
+        return await loop.run_in_executor(self._executor, run_simulation, job.config, report)
@@ -1,7 +1,7 @@
 # The model which contains the propagation function, grid rotation function and the random star function
 
-from circulargrid import CircularGrid
-from scheduler import Scheduler
+from .circulargrid import CircularGrid, age_dtype
+from .scheduler import Scheduler
 import numpy as np
 import random
 
@@ -9,15 +9,23 @@ import random
 class Model:
     """
     The model class which sets up the grid class, and contains the grid and scheduler classes
+    When compact is True the ages are stored in uint8/uint16 arrays sized from REGEN_TIME,
+    and the scheduler only records the ages in its history
     """
 
     def __init__(
-        self, REGEN_TIME, PROPAGATION_PROBABILITY, MAX_RANDOM_STARS, PROPAGATION_SPEED
+        self,
+        REGEN_TIME,
+        PROPAGATION_PROBABILITY,
+        MAX_RANDOM_STARS,
+        PROPAGATION_SPEED,
+        compact=False,
     ):
         self.REGEN_TIME = REGEN_TIME
         self.PROPAGATION_PROBABILITY = PROPAGATION_PROBABILITY
         self.PROPAGATION_SPEED = PROPAGATION_SPEED
         self.MAX_RANDOM_STARS = MAX_RANDOM_STARS
+        self.compact = compact
         self.grid = None
         self.scheduler = None
 
@@ -29,7 +37,12 @@ class Model:
         :return: None
         """
         self.grid = CircularGrid(
-            num_of_rings, cells_per_ring, self.propagation, self.step, self.randomStars
+            num_of_rings,
+            cells_per_ring,
+            self.propagation,
+            self.step,
+            self.randomStars,
+            age_dtype=age_dtype(self.REGEN_TIME) if self.compact else None,
         )
 
     def bind_scheduler(self) -> None:
@@ -62,6 +75,9 @@ class Model:
         :param grid: The grid with class CircularGrid
         :return: Grid with propagated star formation
         """
+        if grid.compact:
+            return self.compactPropagation(grid)
+
         for ring in grid.rings:
             for cell in ring.children:
                 current_age = cell.current_age
@@ -89,6 +105,36 @@ class Model:
 
         return updated_grid
 
+    def compactPropagation(self, grid) -> list:
+        """
+        Propagation for a grid in compact mode. Ages all stars at once in the next age buffer,
+        and only checks the neighbours of the cells that can form a new star
+        :param grid: The grid with class CircularGrid in compact mode
+        :return: Grid with propagated star formation
+        """
+        # max(age, 1) - 1 decrements the living stars and keeps empty cells at 0
+        np.maximum(grid.ages, 1, out=grid.next_ages)
+        grid.next_ages -= 1
+
+        trigger_age = self.REGEN_TIME + 1 - self.PROPAGATION_SPEED
+        for ring in grid.rings:
+            for i in np.flatnonzero(ring.ages == 0):
+                cell = ring.children[i]
+                neighbours = grid.get_neighbours(cell)
+
+                for neighbour in neighbours:
+                    if neighbour.current_age == trigger_age:
+
+                        x = random.random()
+                        if x < self.PROPAGATION_PROBABILITY:
+                            cell.next_age = self.REGEN_TIME
+
+                        break
+
+        grid.swap_ages()
+
+        return grid
+
     def updateGrid(self, grid) -> list:
         """
         Updates the ages of the stars in the grid
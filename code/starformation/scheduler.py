@@ -1,23 +1,28 @@
 # Class that handles the scheduling of the simulation, i.e. when each model and agent step happens.
 
 import numpy as np
-from tqdm import tqdm
+import sys
+from .history import CompactHistory
 
 
 class Scheduler:
-    def __init__(self, grid, timestep=0, iteration_callback=None):
+    def __init__(self, grid, timestep=0, iteration_callback=None, progress_bar=True):
         """ Manages the timesteps on the circular grid
         :param grid: the Circular grid object
         :param timestep: time to wait between each step, only usefull is visualing data. Should be zero otherwise
-        :param iteration_callback: Function that gets called after a completed iteration.
+        :param iteration_callback: Function that gets called after a completed iteration, with the number of
+        completed iterations and the total number of iterations
+        :param progress_bar: Show a tqdm progress bar. tqdm is only imported when it is shown
         """
 
         self.grid = grid
         self.timestep = timestep
         self.iteration_callback = iteration_callback
+        self.progress_bar = progress_bar
         self.started = False
 
-        self.history = []
+        # in compact mode only the ages are recorded, geometry is derived by the history when exported
+        self.history = CompactHistory.from_grid(grid) if grid.compact else []
         self.timestamp = 0
 
     def start(self, dt, t_end) -> None:
@@ -27,15 +32,29 @@ class Scheduler:
         :param t_end: end time of the simulation
         :return: None
         """
-        print("Starting simulation...")
-        for t in tqdm(np.arange(0, t_end, dt)):
+        timestamps = np.arange(0, t_end, dt)
+        iterations = timestamps
+        if self.progress_bar:
+            from tqdm import tqdm
+
+            # stderr like the progress bar, so stdout stays clean for the results
+            print("Starting simulation...", file=sys.stderr)
+            iterations = tqdm(timestamps)
+
+        for iteration, t in enumerate(iterations):
             self.timestamp = t
             self.grid.announce_beforestep()
             self.grid.announce_afterstep()
             self.grid.announce_step()
-            self.history = np.concatenate(
-                (self.history, self.get_snapshot()), axis=None
-            )
+            if self.grid.compact:
+                self.history.append(t, self.grid.ages, self.grid.get_offsets())
+            else:
+                self.history = np.concatenate(
+                    (self.history, self.get_snapshot()), axis=None
+                )
+
+            if self.iteration_callback:
+                self.iteration_callback(iteration + 1, len(timestamps))
 
         return
 
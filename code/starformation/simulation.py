@@ -0,0 +1,139 @@
+# Configuration of single simulations, shared by the command line interface and the job server workers.
+# Only needs numpy, so worker processes start quickly.
+
+from .model import Model
+from .analyse import compactStarFormationRate
+from .clusters import clusterStatistics
+import numpy as np
+import numbers
+import random
+
+# Model, grid and scheduler parameters of a simulation, defaults as in phaseplots.py
+DEFAULT_CONFIG = {
+    "REGEN_TIME": 20,
+    "PROPAGATION_PROBABILITY": 0.2,
+    "MAX_RANDOM_STARS": 10,
+    "PROPAGATION_SPEED": 1,
+    "NUM_OF_RINGS": 10,
+    "CELLS_PER_RING": 5,
+    "INITIAL_STARS": 200,
+    "TIMESTEP": 1.0,
+    "SIMDURATION": 100,
+    "seed": 0,
+}
+
+# Version of the simulation results, part of the job server cache key and stored in every result.
+# Increase it when a change to the model or the statistics changes the results, so old cached results are not used.
+# 2: clusters are indexed by the flat cell index, the old unique ids merged unrelated cells
+RESULT_VERSION = 2
+
+# Minimal number of timeframes of the star formation rate, see analyse.convergenceCheck
+MIN_TIMEFRAMES = 3
+
+# Types of the parameters, integer parameters do not accept fractional values
+PARAMETER_TYPES = {
+    "REGEN_TIME": int,
+    "PROPAGATION_PROBABILITY": float,
+    "MAX_RANDOM_STARS": int,
+    "PROPAGATION_SPEED": int,
+    "NUM_OF_RINGS": int,
+    "CELLS_PER_RING": int,
+    "INITIAL_STARS": int,
+    "TIMESTEP": float,
+    "SIMDURATION": int,
+    "seed": int,
+}
+
+
+def normalise_config(config) -> dict:
+    """
+    Fills in the default parameters of a simulation configuration
+    :param config: Dictionary with (a subset of) the keys of DEFAULT_CONFIG
+    :return: Complete configuration
+    """
+    unknown = set(config) - set(DEFAULT_CONFIG)
+    if unknown:
+        raise ValueError("Unknown simulation parameters: %s" % ", ".join(sorted(unknown)))
+
+    config = {**DEFAULT_CONFIG, **config}
+    for key, kind in PARAMETER_TYPES.items():
+        value = config[key]
+        # also rejects seed=None: an unseeded run is not reproducible, so it could not be cached
+        valid = isinstance(value, numbers.Integral if kind is int else numbers.Real)
+        if not valid or isinstance(value, bool):
+            raise ValueError("%s has to be %s, got %r" % (key, kind.__name__, value))
+        config[key] = kind(value)
+
+    num_of_cells = (
+        config["CELLS_PER_RING"] * config["NUM_OF_RINGS"] * (config["NUM_OF_RINGS"] + 1) // 2
+    )
+    if config["INITIAL_STARS"] > num_of_cells:
+        raise ValueError("INITIAL_STARS is larger than the number of cells in the grid")
+    if config["TIMESTEP"] <= 0:
+        raise ValueError("TIMESTEP has to be positive")
+    # the star formation rate has a value per whole timeframe before the last timestamp,
+    # and the convergence check of the mean rate needs at least MIN_TIMEFRAMES of them
+    timeframes = int(np.arange(0, config["SIMDURATION"], config["TIMESTEP"])[-1])
+    if timeframes < MIN_TIMEFRAMES:
+        raise ValueError(
+            "SIMDURATION %s gives %d timeframes, at least %d are needed"
+            % (config["SIMDURATION"], timeframes, MIN_TIMEFRAMES)
+        )
+
+    return config
+
+
+def build_model(config) -> Model:
+    """
+    Sets up a compact model with grid, scheduler and initial stars, seeded with config["seed"]
+    :param config: Simulation configuration, see DEFAULT_CONFIG
+    :return: Model object, with the complete configuration in model.config
+    """
+    config = normalise_config(config)
+    random.seed(config["seed"])
+
+    model = Model(
+        config["REGEN_TIME"],
+        config["PROPAGATION_PROBABILITY"],
+        config["MAX_RANDOM_STARS"],
+        config["PROPAGATION_SPEED"],
+        compact=True,
+    )
+    model.bind_grid(config["NUM_OF_RINGS"], config["CELLS_PER_RING"])
+    model.bind_scheduler()
+
+    # Initialize random stars first
+    for i in range(config["INITIAL_STARS"]):
+        ring = random.choice(model.grid.rings)
+        cell = random.choice(ring.children)
+
+        while cell.current_age > 0:
+            ring = random.choice(model.grid.rings)
+            cell = random.choice(ring.children)
+
+        cell.current_age = config["REGEN_TIME"]
+
+    model.config = config
+    return model
+
+
+def run_simulation(config, iteration_callback=None) -> dict:
+    """
+    Runs a single compact simulation, seeded with config["seed"]
+    :param config: Simulation configuration, see DEFAULT_CONFIG
+    :param iteration_callback: Optional function that is passed to the scheduler
+    :return: Dictionary with the result version, configuration, star formation rate series and cluster statistics
+    """
+    model = build_model(config)
+    model.scheduler.iteration_callback = iteration_callback
+    model.scheduler.progress_bar = False
+
+    model.scheduler.start(model.config["TIMESTEP"], model.config["SIMDURATION"])
+    rate = compactStarFormationRate(model.scheduler.history, model.config["REGEN_TIME"])
+
+    return {
+        "version": RESULT_VERSION,
+        "config": model.config,
+        "rate": rate.tolist(),
+        "clusters": clusterStatistics(model.grid),
+    }
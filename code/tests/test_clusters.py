@@ -0,0 +1,46 @@
+import numpy as np
+import pytest
+
+from starformation.circulargrid import CircularGrid
+from starformation.clusters import clusterStatistics
+
+
+@pytest.mark.parametrize("age_dtype", [None, np.uint8])
+def test_unique_ids(age_dtype):
+    grid = CircularGrid(10, 5, age_dtype=age_dtype)
+    ids = [cell.unique_id for ring in grid.rings for cell in ring.children]
+    assert ids == list(range(grid.num_of_cells))
+
+
+@pytest.mark.parametrize("age_dtype", [None, np.uint8])
+def test_fully_occupied_grid(age_dtype):
+    grid = CircularGrid(10, 5, age_dtype=age_dtype)
+    for ring in grid.rings:
+        for cell in ring.children:
+            cell.current_age = 5
+
+    assert clusterStatistics(grid) == {
+        "mean_size": 275.0,
+        "max_size": 275,
+        "num_clusters": 1,
+    }
+
+
+def test_separate_groups():
+    grid = CircularGrid(6, 4, age_dtype=np.uint8)
+    # the whole inner ring, and three neighbouring cells in the outer ring
+    for cell in grid.rings[0].children:
+        cell.current_age = 5
+    for i in range(3):
+        grid.get_cell(5, i).current_age = 5
+
+    assert clusterStatistics(grid) == {
+        "mean_size": pytest.approx((4 * 4 + 3 * 3) / 7),
+        "max_size": 4,
+        "num_clusters": 2,
+    }
+
+
+def test_empty_grid():
+    grid = CircularGrid(3, 2, age_dtype=np.uint8)
+    assert clusterStatistics(grid) == {"mean_size": 0.0, "max_size": 0, "num_clusters": 0}
@@ -0,0 +1,107 @@
+import random
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from starformation.analyse import compactStarFormationRate, starFormationRate
+from starformation.circulargrid import CircularGrid, age_dtype
+from starformation.history import CompactHistory
+from starformation.model import Model
+
+REGEN_TIME = 10
+
+
+def run(compact, seed=3):
+    random.seed(seed)
+    model = Model(REGEN_TIME, 0.3, 5, 1, compact=compact)
+    model.bind_grid(8, 4)
+    model.bind_scheduler()
+    model.scheduler.progress_bar = False
+
+    for i in range(20):
+        ring = random.choice(model.grid.rings)
+        cell = random.choice(ring.children)
+        cell.current_age = REGEN_TIME
+
+    model.scheduler.start(1, 40)
+    return model.scheduler.history
+
+
+@pytest.fixture(scope="module")
+def histories():
+    return run(False), run(True)
+
+
+def test_compact_matches_default_mode(histories):
+    full, compact = histories
+    full_records = full.tolist()
+    compact_records = compact.tolist()
+
+    assert len(full_records) == len(compact_records)
+    for a, b in zip(full_records, compact_records):
+        assert (a["t"], a["id"], a["age"], a["parent_ring"]) == (
+            b["t"],
+            b["id"],
+            b["age"],
+            b["parent_ring"],
+        )
+        assert float(a["theta1"]) == pytest.approx(b["theta1"])
+        assert float(a["theta2"]) == pytest.approx(b["theta2"])
+
+
+def test_compact_history_is_small(histories):
+    full, compact = histories
+    assert compact.ages.dtype == np.uint8
+    assert compact.nbytes * 10 < len(full) * 64
+
+
+@pytest.mark.parametrize(
+    "max_age, dtype", [(1, np.uint8), (255, np.uint8), (256, np.uint16), (65535, np.uint16)]
+)
+def test_age_dtype(max_age, dtype):
+    assert age_dtype(max_age) is dtype
+
+
+def test_age_dtype_too_large():
+    with pytest.raises(ValueError):
+        age_dtype(65536)
+
+
+def test_compact_grid_double_buffer():
+    grid = CircularGrid(3, 2, age_dtype=np.uint8)
+    cell = grid.get_cell(1, 2)
+    cell.current_age = 7
+    cell.next_age = 3
+
+    assert grid.ages[cell.index] == 7
+    assert grid.next_ages[cell.index] == 3
+    assert list(grid.rings[1].ages) == [0, 0, 7, 0]
+
+    grid.swap_ages()
+    assert cell.current_age == 3
+
+
+def test_save_load_round_trip(histories, tmp_path):
+    _, compact = histories
+    filename = str(tmp_path / "history.npz")
+    compact.save(filename)
+    loaded = CompactHistory.load(filename)
+
+    assert loaded.ages.dtype == compact.ages.dtype
+    assert np.array_equal(loaded.ages, compact.ages)
+    assert loaded.tolist() == compact.tolist()
+
+
+def test_save_empty_history(tmp_path):
+    filename = str(tmp_path / "empty.npz")
+    CompactHistory(3, 2).save(filename)
+    loaded = CompactHistory.load(filename)
+    assert len(loaded) == 0
+    assert loaded.ages.shape == (0, 12)
+
+
+def test_compact_star_formation_rate(histories):
+    full, compact = histories
+    expected = starFormationRate(pd.DataFrame(full.tolist()), REGEN_TIME)
+    assert np.array_equal(compactStarFormationRate(compact, REGEN_TIME), expected)
@@ -0,0 +1,177 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from starformation.analyse import compactStarFormationRate, starFormationRate
+from starformation.ensemble import (
+    RunningStats,
+    cluster_ensemble,
+    ensemble,
+    find_rate_files,
+    fit_critical_point,
+    history_rate,
+    iter_cached_results,
+    rate_ensemble,
+    read_rate_file,
+)
+from starformation.simulation import RESULT_VERSION, build_model
+
+CODE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_running_stats_matches_numpy():
+    xs = np.random.default_rng(0).normal(size=(50, 3))
+    stats = RunningStats()
+    for x in xs:
+        stats.add(x)
+
+    assert stats.n == 50
+    np.testing.assert_allclose(stats.mean, np.mean(xs, axis=0))
+    np.testing.assert_allclose(stats.variance, np.var(xs, axis=0, ddof=1))
+
+
+def test_running_stats_merge():
+    xs = np.random.default_rng(1).normal(size=(40, 2))
+    first, second = RunningStats(), RunningStats()
+    for x in xs[:15]:
+        first.add(x)
+    for x in xs[15:]:
+        second.add(x)
+    first.merge(second)
+
+    assert first.n == 40
+    np.testing.assert_allclose(first.mean, np.mean(xs, axis=0))
+    np.testing.assert_allclose(first.variance, np.var(xs, axis=0, ddof=1))
+
+
+def test_running_stats_rejects_other_shape():
+    stats = RunningStats()
+    stats.add([1.0, 2.0])
+    with pytest.raises(ValueError):
+        stats.add([1.0, 2.0, 3.0])
+
+
+def test_ensemble_interval_contains_mean():
+    xs = np.random.default_rng(2).normal(5, 1, size=200)
+    result = ensemble(xs, seed=0)
+    assert result["low"] < np.mean(xs) < result["high"]
+    assert result["high"] - result["low"] < 0.5
+
+
+def test_rate_ensemble_on_shipped_replicates():
+    filenames = find_rate_files(os.path.join(CODE_DIR, "100stars"))[(10, 100)]
+    assert len(filenames) == 4
+
+    result = rate_ensemble(filenames, num_bootstrap=200, seed=0)
+    rates = np.array([read_rate_file(filename)[1] for filename in filenames])
+    assert result["n"] == 4
+    assert len(result["pst"]) == 31
+    np.testing.assert_allclose(result["mean"], rates.mean(axis=0))
+    np.testing.assert_allclose(result["std"], rates.std(axis=0, ddof=1))
+    assert np.all(result["low"] <= result["high"])
+
+
+def test_rate_ensemble_skips_different_lengths():
+    # the first replicate of this group was run for fewer probabilities
+    filenames = find_rate_files(os.path.join(CODE_DIR, "200stars"))[(20, 200)]
+    result = rate_ensemble(filenames, num_bootstrap=100, seed=0)
+
+    assert result["n"] == 3
+    assert len(result["pst"]) == 31
+    assert result["skipped"] == [(filenames[0], "11 Pst values, expected 31")]
+    rates = np.array([read_rate_file(filename)[1] for filename in filenames[1:]])
+    np.testing.assert_allclose(result["mean"], rates.mean(axis=0))
+
+
+def test_rate_ensemble_skips_different_values(tmp_path):
+    filenames = find_rate_files(os.path.join(CODE_DIR, "100stars"))[(10, 100)]
+    pst, rate = read_rate_file(filenames[0])
+    shifted = str(tmp_path / "Rate_Pst_10_100_5.csv")
+    with open(shifted, "w") as f:
+        f.write(",Pst,Rate\n")
+        for i, (p, r) in enumerate(zip(pst + 0.005, rate)):
+            f.write("%d,%s,%s\n" % (i, p, r))
+
+    result = rate_ensemble(filenames + [shifted], num_bootstrap=100)
+    assert result["n"] == 4
+    assert result["skipped"] == [(shifted, "different Pst values")]
+
+
+def test_history_rate_csv():
+    filename = os.path.join(CODE_DIR, "clusterdata", "prob2_0.1.csv")
+    expected = starFormationRate(pd.read_csv(filename), 10)
+    assert np.array_equal(history_rate(filename, 10), expected)
+
+
+@pytest.mark.parametrize("chunk_rows", [1, 7, 1024])
+def test_history_rate_npz(tmp_path, chunk_rows):
+    model = build_model(
+        {"NUM_OF_RINGS": 5, "CELLS_PER_RING": 3, "INITIAL_STARS": 10, "REGEN_TIME": 6}
+    )
+    model.scheduler.progress_bar = False
+    model.scheduler.start(1, 30)
+    filename = str(tmp_path / "history.npz")
+    model.scheduler.history.save(filename)
+
+    rate = history_rate(filename, 6, chunk_rows)
+    expected = compactStarFormationRate(model.scheduler.history, 6)
+    assert np.array_equal(rate, expected)
+
+
+def write_result(directory, name, config, clusters):
+    with open(os.path.join(directory, name + ".json"), "w") as f:
+        json.dump({"version": RESULT_VERSION, "config": config, "rate": [], "clusters": clusters}, f)
+
+
+def test_iter_cached_results_and_cluster_ensemble(tmp_path):
+    directory = str(tmp_path)
+    write_result(directory, "a", {"REGEN_TIME": 5}, {"max_size": 4, "num_clusters": 1})
+    write_result(directory, "b", {"REGEN_TIME": 5}, {"max_size": 8, "num_clusters": 3})
+    write_result(directory, "c", {"REGEN_TIME": 10}, {"max_size": 100, "num_clusters": 9})
+    # a result of an older version is stale and ignored
+    with open(os.path.join(directory, "d.json"), "w") as f:
+        json.dump({"config": {"REGEN_TIME": 5}, "clusters": {"max_size": 1000, "num_clusters": 0}}, f)
+    with open(os.path.join(directory, "notes.txt"), "w") as f:
+        f.write("not a result")
+
+    assert len(list(iter_cached_results(directory))) == 3
+    results = iter_cached_results(directory, REGEN_TIME=5)
+    stats = cluster_ensemble(results, num_bootstrap=100, seed=0)
+
+    assert stats["max_size"]["n"] == 2
+    assert stats["max_size"]["mean"] == pytest.approx(6)
+    assert stats["max_size"]["std"] == pytest.approx(np.std([4, 8], ddof=1))
+    assert stats["num_clusters"]["mean"] == pytest.approx(2)
+    assert 4 <= stats["max_size"]["low"] <= stats["max_size"]["high"] <= 8
+
+
+def test_fit_critical_point_synthetic():
+    pst = np.linspace(0.1, 0.4, 31)
+    rate = np.where(pst > 0.17, 3 * np.clip(pst - 0.17, 0, None) ** 0.5, 0)
+    fit = fit_critical_point(pst, rate)
+
+    assert fit["pc"] == pytest.approx(0.17, abs=1e-3)
+    assert fit["beta"] == pytest.approx(0.5, abs=1e-2)
+    assert fit["amplitude"] == pytest.approx(3, rel=1e-2)
+    assert not fit["at_edge"]
+
+
+def test_fit_critical_point_below_lowest_pst():
+    # all rates positive: pc has to be searched below the lowest Pst
+    pst = np.linspace(0.1, 0.4, 31)
+    rate = 2 * (pst - 0.04) ** 1.5
+    fit = fit_critical_point(pst, rate)
+
+    assert fit["pc"] == pytest.approx(0.04, abs=1e-3)
+    assert fit["beta"] == pytest.approx(1.5, abs=1e-2)
+    assert not fit["at_edge"]
+
+
+def test_fit_critical_point_flags_edge():
+    pst = np.linspace(0.1, 0.4, 31)
+    rate = 2 * (pst - 0.04) ** 1.5
+    fit = fit_critical_point(pst, rate, pc_min=0.06)
+    assert fit["at_edge"]
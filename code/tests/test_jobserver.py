@@ -0,0 +1,130 @@
+import asyncio
+
+import pytest
+
+from starformation import jobserver
+from starformation.jobserver import InProcessJobServer, JobServer, ResultCache, config_key
+
+CONFIG = {
+    "NUM_OF_RINGS": 4,
+    "CELLS_PER_RING": 3,
+    "INITIAL_STARS": 5,
+    "REGEN_TIME": 5,
+    "MAX_RANDOM_STARS": 2,
+    "SIMDURATION": 12,
+    "PROPAGATION_PROBABILITY": 0.3,
+}
+
+
+def test_config_key_fills_defaults():
+    assert config_key(CONFIG) == config_key({**CONFIG, "seed": 0})
+    assert config_key(CONFIG) != config_key({**CONFIG, "seed": 1})
+
+
+@pytest.mark.parametrize("seed", [None, 1.5, "1", True])
+def test_config_key_requires_integer_seed(seed):
+    with pytest.raises(ValueError):
+        config_key({**CONFIG, "seed": seed})
+
+
+def test_dedup_cache_and_progress(tmp_path):
+    async def run():
+        async with InProcessJobServer(str(tmp_path)) as server:
+            first = await server.submit(CONFIG)
+            second = await server.submit(CONFIG)
+            assert first is second
+            assert not first.cached
+
+            progress = [item async for item in first.progress()]
+            result = await first.result()
+
+            cached = await server.submit(CONFIG)
+            assert cached.cached
+            assert await cached.result() == result
+            assert await server.rate(CONFIG) == result["rate"]
+            return progress, result
+
+    progress, result = asyncio.run(run())
+    assert progress[-1] == (12, 12)
+    assert [done for done, _ in progress] == sorted(done for done, _ in progress)
+    assert len(result["rate"]) == 11
+    assert set(result["clusters"]) == {"mean_size", "max_size", "num_clusters"}
+    assert len(list(tmp_path.glob("*.json"))) == 1
+
+
+def test_cache_survives_server_restart(tmp_path):
+    async def run():
+        async with InProcessJobServer(str(tmp_path)) as server:
+            rate = await server.rate(CONFIG)
+        async with InProcessJobServer(str(tmp_path)) as server:
+            job = await server.submit(CONFIG)
+            return rate, job.cached, (await job.result())["rate"]
+
+    rate, cached, cached_rate = asyncio.run(run())
+    assert cached
+    assert cached_rate == rate
+
+
+@pytest.mark.parametrize("key, value", [("REGEN_TIME", 2.5), ("TIMESTEP", "1")])
+def test_config_key_checks_types(key, value):
+    with pytest.raises(ValueError):
+        config_key({**CONFIG, key: value})
+
+
+def test_config_key_includes_result_version(monkeypatch):
+    key = config_key(CONFIG)
+    monkeypatch.setattr(jobserver, "RESULT_VERSION", jobserver.RESULT_VERSION + 1)
+    assert config_key(CONFIG) != key
+
+
+def test_stale_cache_entry_is_recomputed(tmp_path):
+    cache = ResultCache(str(tmp_path))
+    key = config_key(CONFIG)
+    cache.put(key, {"config": CONFIG, "rate": [], "clusters": {}})
+    assert cache.get(key) is None
+
+    async def run():
+        async with InProcessJobServer(str(tmp_path)) as server:
+            job = await server.submit(CONFIG)
+            return job.cached, await job.result()
+
+    cached, result = asyncio.run(run())
+    assert not cached
+    assert result["version"] == jobserver.RESULT_VERSION
+    assert cache.get(key) == result
+
+
+def test_config_key_normalises_numbers():
+    assert config_key({**CONFIG, "TIMESTEP": 1}) == config_key({**CONFIG, "TIMESTEP": 1.0})
+
+
+def test_failed_job_is_not_cached(tmp_path, monkeypatch):
+    def fail(config, iteration_callback=None):
+        raise RuntimeError("simulation failed")
+
+    monkeypatch.setattr(jobserver, "run_simulation", fail)
+
+    async def run():
+        async with InProcessJobServer(str(tmp_path)) as server:
+            job = await server.submit(CONFIG)
+            with pytest.raises(RuntimeError):
+                await job.result()
+
+    asyncio.run(run())
+    assert not list(tmp_path.glob("*.json"))
+
+
+def test_process_pool_smoke(tmp_path):
+    async def run():
+        async with JobServer(str(tmp_path), workers=1) as server:
+            job = await server.submit(CONFIG)
+            progress = [item async for item in job.progress()]
+            result = await job.result()
+            cached = await server.submit(CONFIG)
+            return job, progress, result, cached
+
+    job, progress, result, cached = asyncio.run(run())
+    assert progress[-1] == (12, 12)
+    assert (job.done_steps, job.total_steps) == (12, 12)
+    assert len(result["rate"]) == 11
+    assert cached.cached
@@ -0,0 +1,72 @@
+import os
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+
+from starformation.analyse import convergenceCheck, meanStarFormationRate
+from starformation.simulation import normalise_config, run_simulation
+
+CODE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CONFIG = {
+    "NUM_OF_RINGS": 4,
+    "CELLS_PER_RING": 3,
+    "INITIAL_STARS": 5,
+    "REGEN_TIME": 5,
+    "MAX_RANDOM_STARS": 2,
+}
+
+
+@pytest.mark.parametrize("duration, timestep", [(1, 1.0), (2, 1.0), (3, 1.0), (3, 0.5)])
+def test_too_short_simduration(duration, timestep):
+    with pytest.raises(ValueError, match="timeframes"):
+        normalise_config({**CONFIG, "SIMDURATION": duration, "TIMESTEP": timestep})
+
+
+def test_timestep_has_to_be_positive():
+    with pytest.raises(ValueError):
+        normalise_config({**CONFIG, "TIMESTEP": 0.0})
+
+
+@pytest.mark.parametrize("duration, timestep", [(4, 1.0), (4, 0.5)])
+def test_shortest_simulation_has_mean_rate(duration, timestep):
+    result = run_simulation({**CONFIG, "SIMDURATION": duration, "TIMESTEP": timestep})
+    assert len(result["rate"]) >= 3
+    assert meanStarFormationRate(np.array(result["rate"])) >= 0
+
+
+@pytest.mark.parametrize("length", [0, 1, 2])
+def test_convergence_check_short_series(length):
+    with pytest.raises(ValueError):
+        convergenceCheck(np.ones(length))
+
+
+def test_convergence_check_three_values():
+    assert len(convergenceCheck(np.array([1.0, 2.0, 3.0]))) >= 1
+
+
+def test_cli_rejects_short_simduration():
+    process = subprocess.run(
+        [sys.executable, "-m", "starformation", "simulate", "-q", "--simduration", "3"],
+        cwd=CODE_DIR,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        timeout=30,
+    )
+    assert process.returncode != 0
+    assert b"timeframes" in process.stderr
+    assert process.stdout == b""
+
+
+def test_phaseplots_uses_simulation():
+    sys.path.insert(0, CODE_DIR)
+    try:
+        import phaseplots
+    finally:
+        sys.path.remove(CODE_DIR)
+
+    rates = phaseplots.starFormationRates({**CONFIG, "SIMDURATION": 10}, [0.1, 0.5])
+    assert len(rates) == 2
+    assert all(rate >= 0 for rate in rates)
@@ -0,0 +1,80 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+CODE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HEAVY_MODULES = ["pandas", "matplotlib", "tqdm"]
+
+# Budgets for importing the worker path on top of numpy, currently about 0.05s and 100 modules
+IMPORT_TIME_BUDGET = 0.5
+IMPORT_MODULES_BUDGET = 150
+
+MEASURE = """
+import json, sys, time
+import numpy
+before = set(sys.modules)
+start = time.perf_counter()
+import %s
+print(json.dumps({
+    "time": time.perf_counter() - start,
+    "modules": sorted(set(sys.modules) - before),
+}))
+"""
+
+
+def measure_import(module) -> dict:
+    """
+    Imports module in a fresh interpreter
+    :return: Dictionary with the import time on top of numpy and the newly loaded modules
+    """
+    output = subprocess.run(
+        [sys.executable, "-c", MEASURE % module],
+        cwd=CODE_DIR,
+        check=True,
+        stdout=subprocess.PIPE,
+    ).stdout
+    return json.loads(output)
+
+
+@pytest.mark.parametrize(
+    "module",
+    [
+        "starformation.simulation",
+        "starformation.jobserver",
+        "starformation.cli",
+        "phaseplots",
+        "varying_prob",
+        "clusters",
+    ],
+)
+def test_import_skips_plotting_and_pandas(module):
+    loaded = measure_import(module)["modules"]
+    for heavy in HEAVY_MODULES:
+        assert heavy not in loaded, "%s imports %s" % (module, heavy)
+
+
+def test_worker_import_budget():
+    # best of three runs, so a busy machine does not fail the test
+    runs = [measure_import("starformation.jobserver") for _ in range(3)]
+    assert min(run["time"] for run in runs) < IMPORT_TIME_BUDGET
+    assert len(runs[0]["modules"]) < IMPORT_MODULES_BUDGET
+
+
+def test_headless_simulate_prints_only_json():
+    output = subprocess.run(
+        [
+            sys.executable, "-m", "starformation", "simulate",
+            "--num-of-rings", "4", "--cells-per-ring", "3", "--initial-stars", "5",
+            "--simduration", "10", "--timestep", "0.5",
+        ],
+        cwd=CODE_DIR,
+        check=True,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+    ).stdout
+    result = json.loads(output)
+    assert result["config"]["TIMESTEP"] == 0.5
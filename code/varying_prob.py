@@ -1,45 +1,42 @@
 # Produces animations and saves data to csv for propagation probabilities [0.1, 0.2, ... , 0.6]
 
-from visualise import Visualise
-from model import Model
-from analyse import *
-import matplotlib.pyplot as plt
-import random
-import pandas as pd
-
-REGEN_TIME = 10
-MAX_RANDOM_STARS = 5
-NUM_OF_RINGS = 8
-CELLS_PER_RING = 4
-TIMESTEP = 1
-SIMDURATION = 50
-PROPAGATION_SPEED = 1
+from starformation.simulation import build_model
+
+CONFIG = {
+    "REGEN_TIME": 10,
+    "MAX_RANDOM_STARS": 5,
+    "NUM_OF_RINGS": 8,
+    "CELLS_PER_RING": 4,
+    "TIMESTEP": 1,
+    "SIMDURATION": 50,
+    "PROPAGATION_SPEED": 1,
+    "INITIAL_STARS": 20,
+    "seed": 0,
+}
 prop_probabilities = [0.1, 0.2, 0.3, 0.4, 0.5, 0.6]
-INITIAL_STARS = 20
 
-# Loop throuh all probabilities
-for probability in prop_probabilities:
 
-    model = Model(REGEN_TIME, probability, MAX_RANDOM_STARS, PROPAGATION_SPEED)
-    model.bind_grid(NUM_OF_RINGS, CELLS_PER_RING)
-    model.bind_scheduler()
+def simulateHistory(config):
+    """
+    Runs a simulation and returns its full history, with the angles of the cells derived from the compact history
+    :param config: Simulation configuration, see starformation.simulation.DEFAULT_CONFIG
+    :return: Tuple of the model and a dataframe with columns t, id, age, parent_ring, theta1, theta2
+    """
+    import pandas as pd
 
-    # Initialize random stars first
-    for i in range(INITIAL_STARS):
-        ring = random.choice(model.grid.rings)
-        cell = random.choice(ring.children)
+    model = build_model(config)
+    model.scheduler.start(model.config["TIMESTEP"], model.config["SIMDURATION"])
+    return model, pd.DataFrame(model.scheduler.history.tolist())
 
-        while cell.current_age > 0:
-            ring = random.choice(model.grid.rings)
-            cell = random.choice(ring.children)
 
-        cell.current_age = REGEN_TIME
+if __name__ == "__main__":
+    from starformation.visualise import Visualise
 
-    model.scheduler.start(TIMESTEP, SIMDURATION)
-    df = pd.DataFrame(model.scheduler.history.tolist())
-    starsformed = starFormationRate(df, REGEN_TIME)
-    conv = convergenceCheck(starsformed)
+    # Loop throuh all probabilities
+    for probability in prop_probabilities:
 
-    plotter = Visualise(model.grid)
-    plotter.animate(df, probability)
-    df.to_csv(f"prob2_{probability}.csv")
+        model, df = simulateHistory(dict(CONFIG, PROPAGATION_PROBABILITY=probability))
+
+        plotter = Visualise(model.grid)
+        plotter.animate(df, probability)
+        df.to_csv(f"prob2_{probability}.csv")